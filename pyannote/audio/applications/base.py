@@ -31,6 +31,8 @@ import os
 import sys
 import time
 import yaml
+from argparse import ArgumentParser
+from argparse import RawDescriptionHelpFormatter
 from typing import Optional
 from pathlib import Path
 from os.path import dirname, basename
@@ -40,12 +42,103 @@ from glob import glob
 from pyannote.database import FileFinder
 from pyannote.database import get_protocol
 from pyannote.audio.util import mkdir_p
+from pyannote.audio.features import Precomputed
+from pyannote.audio.features import RawAudio
 from pyannote.audio.features.utils import get_audio_duration
 from sortedcontainers import SortedDict
-import tensorboardX
 from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pyannote.core.utils.helper import get_class_by_name
 import warnings
+from pyannote.audio import __version__
+
+
+def get_parser(description):
+    """Get command line parser for "train", "validate" and "apply" modes
+
+    Parameters
+    ----------
+    description : str
+        Application description (usually, the module docstring), shown with
+        --help.
+
+    Returns
+    -------
+    parser : ArgumentParser
+        Main parser. Selected mode is available as the "mode" attribute of
+        parsed arguments.
+    modes : dict
+        Sub-parsers for "train", "validate" and "apply" modes, indexed by mode
+        name, with options common to all applications already added.
+        Application-specific positional arguments and options still have to
+        be added to them.
+    """
+
+    parser = ArgumentParser(description=description,
+                            formatter_class=RawDescriptionHelpFormatter)
+    parser.add_argument('--version', action='version',
+                        version=f'%(prog)s {__version__}')
+
+    common = ArgumentParser(add_help=False)
+    common.add_argument(
+        '--database', metavar='<database.yml>', dest='db_yml',
+        help='Path to pyannote.database configuration file.')
+    common.add_argument(
+        '--subset', metavar='<subset>',
+        help='Set subset (train|development|test). Defaults to "train" in '
+             '"train" mode. Defaults to "development" in "validate" mode. '
+             'Defaults to "test" in "apply" mode.')
+    common.add_argument(
+        '--gpu', action='store_true',
+        help='Run on GPUs. Defaults to using CPUs.')
+    common.add_argument(
+        '--batch', metavar='<size>', dest='batch_size', type=int, default=32,
+        help='Set batch size. Has no effect in "train" mode. Defaults to 32.')
+    common.add_argument(
+        '--from', metavar='<epoch>', dest='from_epoch', type=int, default=0,
+        help='Start {train|validat}ing at epoch <epoch>. Has no effect in '
+             '"apply" mode. Defaults to 0.')
+    common.add_argument(
+        '--to', metavar='<epoch>', dest='to_epoch', type=int, default=None,
+        help='End {train|validat}ing at epoch <epoch>. Defaults to keep '
+             'going forever.')
+
+    subparsers = parser.add_subparsers(dest='mode', metavar='<mode>')
+    subparsers.required = True
+
+    modes = {
+        'train': subparsers.add_parser(
+            'train', parents=[common], help='Train model.'),
+        'validate': subparsers.add_parser(
+            'validate', parents=[common],
+            help='Validate model in parallel to training.'),
+        'apply': subparsers.add_parser(
+            'apply', parents=[common], help='Apply validated model.'),
+    }
+
+    for mode in ['validate', 'apply']:
+        modes[mode].add_argument(
+            '--pin-memory', action='store_true',
+            help='Use page-locked memory for host-to-device copies. Only '
+                 'useful with --gpu.')
+        modes[mode].add_argument(
+            '--autocast', metavar='<dtype>', default='fp32',
+            choices=['fp32', 'fp16', 'bf16'],
+            help='Run model with automatic mixed precision (fp16|bf16). '
+                 'Defaults to full precision (fp32).')
+        modes[mode].add_argument(
+            '--async-copy', action='store_true',
+            help='Send batches to GPU on a dedicated CUDA stream, overlapping '
+                 'with processing of previous batch. Implies --pin-memory. '
+                 'Only useful with --gpu.')
+
+    modes['apply'].add_argument(
+        '--prefetch', metavar='<n>', type=int, default=2,
+        help='Extract features of up to <n> upcoming files in the '
+             'background. Defaults to 2.')
+
+    return parser, modes
 
 
 class Application(object):
@@ -284,6 +377,43 @@ class Application(object):
 
         return self.model_
 
+    def prefetch_features(self, files, prefetch=2):
+        """Extract features of upcoming files in the background
+
+        Parameters
+        ----------
+        files : iterable
+            Files (from pyannote.database protocol).
+        prefetch : int, optional
+            Extract features of up to that many files ahead of the one
+            currently being yielded. Defaults to 2. Set to 0 to disable.
+
+        Yields
+        ------
+        current_file : dict
+            File with additional "features" entry (unless features are
+            precomputed or extracted on demand from raw audio).
+        """
+
+        # Precomputed and RawAudio only load the part they need on demand
+        if prefetch < 1 or \
+           isinstance(self.feature_extraction_, (Precomputed, RawAudio)):
+            yield from files
+            return
+
+        def extract(current_file):
+            current_file['features'] = self.feature_extraction_(current_file)
+            return current_file
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            queue = deque()
+            for current_file in files:
+                queue.append(executor.submit(extract, current_file))
+                if len(queue) > prefetch:
+                    yield queue.popleft().result()
+            while queue:
+                yield queue.popleft().result()
+
     def get_number_of_epochs(self, train_dir=None, return_first=False):
         """Get information about completed epochs
 
@@ -332,6 +462,7 @@ class Application(object):
         params_yml = validate_dir / 'params.yml'
         validate_dir.mkdir(parents=True, exist_ok=False)
 
+        import tensorboardX
         writer = tensorboardX.SummaryWriter(logdir=str(validate_dir))
 
         validation_data = self.validate_init(protocol_name, subset=subset,
@@ -35,7 +35,6 @@ from pyannote.database import get_protocol
 from pyannote.database import get_annotated
 from pyannote.audio.features import Precomputed
 from pyannote.audio.features import RawAudio
-from pyannote.audio.labeling.extraction import SequenceLabeling
 from pyannote.core.utils.helper import get_class_by_name
 from functools import partial
 import multiprocessing as mp
@@ -95,6 +94,8 @@ class BaseLabeling(Application):
                     step: Optional[float] = None,
                     subset: Optional[str] = "test"):
 
+        from pyannote.audio.labeling.extraction import SequenceLabeling
+
         model = self.model_.to(self.device)
         model.eval()
 
@@ -114,7 +115,8 @@ class BaseLabeling(Application):
         sequence_labeling = SequenceLabeling(
             model=model, feature_extraction=self.feature_extraction_,
             duration=duration, step=step, batch_size=self.batch_size,
-            device=self.device)
+            device=self.device, pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
 
         sliding_window = sequence_labeling.sliding_window
 
@@ -129,7 +131,9 @@ class BaseLabeling(Application):
         protocol = get_protocol(protocol_name, progress=True,
                                 preprocessors=self.preprocessors_)
 
-        for current_file in getattr(protocol, subset)():
+        files = self.prefetch_features(getattr(protocol, subset)(),
+                                       prefetch=self.prefetch)
+        for current_file in files:
             fX = sequence_labeling(current_file)
             precomputed.dump(current_file, fX)
 
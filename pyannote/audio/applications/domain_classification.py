@@ -29,45 +29,6 @@
 """
 Domain classification
 
-Usage:
-  pyannote-domain-classification train [options] <experiment_dir> <database.task.protocol>
-  pyannote-domain-classification validate [options] [--every=<epoch> --chronological] <train_dir> <database.task.protocol>
-  pyannote-domain-classification apply [options] [--step=<step>] <model.pt> <database.task.protocol> <output_dir>
-  pyannote-domain-classification -h | --help
-  pyannote-domain-classification --version
-
-Common options:
-  <database.task.protocol>   Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")
-  --database=<database.yml>  Path to pyannote.database configuration file.
-  --subset=<subset>          Set subset (train|developement|test).
-                             Defaults to "train" in "train" mode. Defaults to
-                             "development" in "validate" mode. Defaults to all subsets in
-                             "apply" mode.
-  --gpu                      Run on GPUs. Defaults to using CPUs.
-  --batch=<size>             Set batch size. Has no effect in "train" mode.
-                             [default: 32]
-  --from=<epoch>             Start {train|validat}ing at epoch <epoch>. Has no
-                             effect in "apply" mode. [default: 0]
-  --to=<epochs>              End {train|validat}ing at epoch <epoch>.
-                             Defaults to keep going forever.
-
-"train" mode:
-  <experiment_dir>           Set experiment root directory. This script expects
-                             a configuration file called "config.yml" to live
-                             in this directory. See "Configuration file"
-                             section below for more details.
-
-"validation" mode:
-  --every=<epoch>            Validate model every <epoch> epochs [default: 1].
-  --chronological            Force validation in chronological order.
-  <train_dir>                Path to the directory containing pre-trained
-                             models (i.e. the output of "train" mode).
-
-"apply" mode:
-  <model.pt>                 Path to the pretrained model.
-  --step=<step>              Sliding window step, in seconds.
-                             Defaults to 25% of window duration.
-
 Configuration file:
     The configuration of each experiment is described in a file called
     <experiment_dir>/config.yml, that describes the feature extraction process,
@@ -150,31 +111,31 @@ Configuration file:
 
 from functools import partial
 from pathlib import Path
-import torch
 import numpy as np
-import scipy.optimize
-from docopt import docopt
+from .base import get_parser
 from .base_labeling import BaseLabeling
 from pyannote.database import get_annotated
-from pyannote.audio.labeling.extraction import SequenceLabeling
 from collections import Counter
-from sklearn.metrics import confusion_matrix
-
-
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 
 
 def plot_confusion_matrix(y_true, y_pred, classes,
                           normalize=False,
                           title=None,
-                          cmap=plt.cm.Blues):
+                          cmap=None):
     """
     This function prints and plots the confusion matrix.
     Normalization can be applied by setting `normalize=True`.
     """
+
+    from sklearn.metrics import confusion_matrix
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if cmap is None:
+        cmap = plt.cm.Blues
+
     if not title:
         if normalize:
             title = 'Normalized confusion matrix'
@@ -226,6 +187,8 @@ class DomainClassification(BaseLabeling):
     def validate_epoch(self, epoch, protocol_name, subset='development',
                        validation_data=None):
 
+        from pyannote.audio.labeling.extraction import SequenceLabeling
+
         # load model for current epoch
         model = self.load_model(epoch).to(self.device)
         model.eval()
@@ -237,7 +200,8 @@ class DomainClassification(BaseLabeling):
         sequence_labeling = SequenceLabeling(
             model=model, feature_extraction=self.feature_extraction_,
             duration=duration, step=.25 * duration, batch_size=self.batch_size,
-            device=self.device)
+            device=self.device, pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
 
         y_true_file, y_pred_file = [], []
 
@@ -254,32 +218,70 @@ class DomainClassification(BaseLabeling):
                 'minimize': False,
                 'value': float(accuracy)}
 
+
+parser, modes = get_parser(__doc__)
+
+modes['train'].add_argument(
+    'experiment_dir', metavar='<experiment_dir>', type=Path,
+    help='Set experiment root directory. This script expects a configuration '
+         'file called "config.yml" to live in this directory. See '
+         '"Configuration file" section of --help for more details.')
+
+modes['validate'].add_argument(
+    'train_dir', metavar='<train_dir>', type=Path,
+    help='Path to the directory containing pre-trained models (i.e. the '
+         'output of "train" mode).')
+modes['validate'].add_argument(
+    '--every', metavar='<epoch>', type=int, default=1,
+    help='Validate model every <epoch> epochs. Defaults to 1.')
+modes['validate'].add_argument(
+    '--chronological', action='store_true',
+    help='Force validation in chronological order.')
+
+modes['apply'].add_argument(
+    'model_pt', metavar='<model.pt>', type=Path,
+    help='Path to the pretrained model.')
+modes['apply'].add_argument(
+    '--step', metavar='<step>', type=float, default=None,
+    help='Sliding window step, in seconds. Defaults to 25%% of window '
+         'duration.')
+
+for mode_parser in modes.values():
+    mode_parser.add_argument(
+        'protocol_name', metavar='<database.task.protocol>',
+        help='Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")')
+modes['apply'].add_argument(
+    'output_dir', metavar='<output_dir>', type=Path,
+    help='Path to the output directory.')
+
+
 def main():
-    arguments = docopt(__doc__, version='Domain classification')
+    arguments = parser.parse_args()
 
-    db_yml = arguments['--database']
-    protocol_name = arguments['<database.task.protocol>']
-    subset = arguments['--subset']
+    # only import torch once arguments are parsed, so that --help is fast
+    import torch
 
-    gpu = arguments['--gpu']
+    db_yml = arguments.db_yml
+    protocol_name = arguments.protocol_name
+    subset = arguments.subset
+
+    gpu = arguments.gpu
     device = torch.device('cuda') if gpu else torch.device('cpu')
 
-    if arguments['train']:
-        experiment_dir = Path(arguments['<experiment_dir>'])
+    if arguments.mode == 'train':
+        experiment_dir = arguments.experiment_dir
         experiment_dir = experiment_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'train'
 
         # start training at this epoch (defaults to 0)
-        restart = int(arguments['--from'])
+        restart = arguments.from_epoch
 
         # stop training at this epoch (defaults to never stop)
-        epochs = arguments['--to']
+        epochs = arguments.to_epoch
         if epochs is None:
             epochs = np.inf
-        else:
-            epochs = int(epochs)
 
         application = DomainClassification(experiment_dir, db_yml=db_yml,
                                            training=True)
@@ -287,59 +289,69 @@ def main():
         application.train(protocol_name, subset=subset,
                           restart=restart, epochs=epochs)
 
-    if arguments['validate']:
+    if arguments.mode == 'validate':
 
-        train_dir = Path(arguments['<train_dir>'])
+        train_dir = arguments.train_dir
         train_dir = train_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'development'
 
         # start validating at this epoch (defaults to 0)
-        start = int(arguments['--from'])
+        start = arguments.from_epoch
 
         # stop validating at this epoch (defaults to np.inf)
-        end = arguments['--to']
+        end = arguments.to_epoch
         if end is None:
             end = np.inf
-        else:
-            end = int(end)
 
         # validate every that many epochs (defaults to 1)
-        every = int(arguments['--every'])
+        every = arguments.every
 
         # validate epochs in chronological order
-        in_order = arguments['--chronological']
+        in_order = arguments.chronological
 
         # batch size
-        batch_size = int(arguments['--batch'])
+        batch_size = arguments.batch_size
+
+        # use page-locked memory for host-to-device copies
+        pin_memory = arguments.pin_memory
 
         application = DomainClassification.from_train_dir(
             train_dir, db_yml=db_yml, training=False)
         application.device = device
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
         application.validate(protocol_name, subset=subset,
                              start=start, end=end, every=every,
                              in_order=in_order)
 
-    if arguments['apply']:
+    if arguments.mode == 'apply':
 
-        model_pt = Path(arguments['<model.pt>'])
+        model_pt = arguments.model_pt
         model_pt = model_pt.expanduser().resolve(strict=True)
 
-        output_dir = Path(arguments['<output_dir>'])
+        output_dir = arguments.output_dir
         output_dir = output_dir.expanduser().resolve(strict=False)
 
         # TODO. create README file in <output_dir>
 
-        step = arguments['--step']
-        if step is not None:
-            step = float(step)
+        step = arguments.step
+
+        batch_size = arguments.batch_size
+        pin_memory = arguments.pin_memory
 
-        batch_size = int(arguments['--batch'])
+        # extract features of upcoming files in the background
+        prefetch = arguments.prefetch
 
         application = DomainClassification.from_model_pt(
             model_pt, db_yml=db_yml, training=False)
         application.device = device
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
+        application.prefetch = prefetch
         application.apply(protocol_name, output_dir, step=step, subset=subset)
@@ -80,8 +80,9 @@ from pyannote.core.utils.helper import get_class_by_name
 from pyannote.audio.features import Precomputed
 from pyannote.audio.features.utils import get_audio_duration
 from pyannote.audio.features.precomputed import PyannoteFeatureExtractionError
+from pyannote.audio.util import get_cpu_count
 
-from multiprocessing import cpu_count, Pool
+from multiprocessing import Pool
 
 
 def init_feature_extraction(experiment_dir):
@@ -181,7 +182,7 @@ def extract(protocol_name, file_finder, experiment_dir,
                                         config_yml=config_yml,
                                         robust=robust)
 
-        n_jobs = cpu_count()
+        n_jobs = get_cpu_count()
         pool = Pool(n_jobs)
         imap = pool.imap
 
@@ -29,49 +29,6 @@
 """
 Overlapping speech detection
 
-Usage:
-  pyannote-overlap-detection train [options] <experiment_dir> <database.task.protocol>
-  pyannote-overlap-detection validate [options] [--every=<epoch> --chronological --precision=<precision>] <train_dir> <database.task.protocol>
-  pyannote-overlap-detection apply [options] [--step=<step>] <validate_dir> <database.task.protocol>
-  pyannote-overlap-detection -h | --help
-  pyannote-overlap-detection --version
-
-Common options:
-  <database.task.protocol>   Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")
-  --database=<database.yml>  Path to pyannote.database configuration file.
-  --subset=<subset>          Set subset (train|developement|test).
-                             Defaults to "train" in "train" mode. Defaults to
-                             "development" in "validate" mode. Defaults to
-                             "test" in "apply" mode.
-  --gpu                      Run on GPUs. Defaults to using CPUs.
-  --batch=<size>             Set batch size. Has no effect in "train" mode.
-                             [default: 32]
-  --from=<epoch>             Start {train|validat}ing at epoch <epoch>. Has no
-                             effect in "apply" mode. [default: 0]
-  --to=<epochs>              End {train|validat}ing at epoch <epoch>.
-                             Defaults to keep going forever.
-
-"train" mode:
-  <experiment_dir>           Set experiment root directory. This script expects
-                             a configuration file called "config.yml" to live
-                             in this directory. See "Configuration file"
-                             section below for more details.
-
-"validation" mode:
-  --every=<epoch>            Validate model every <epoch> epochs [default: 1].
-  --chronological            Force validation in chronological order.
-  --parallel=<n_jobs>        Process <n_jobs> files in parallel. Defaults to
-                             using all CPUs.
-  <train_dir>                Path to the directory containing pre-trained
-                             models (i.e. the output of "train" mode).
-  --precision=<precision>    Target detection precision [default: 0.8].
-
-"apply" mode:
-  <validate_dir>             Path to the directory containing validation
-                             results (i.e. the output of "validate" mode).
-  --step=<step>              Sliding window step, in seconds.
-                             Defaults to 25% of window duration.
-
 Configuration file:
     The configuration of each experiment is described in a file called
     <experiment_dir>/config.yml, that describes the feature extraction process,
@@ -151,18 +108,11 @@ Configuration file:
 
 from functools import partial
 from pathlib import Path
-import torch
 import numpy as np
-from docopt import docopt
-import multiprocessing as mp
+from pyannote.audio.util import get_cpu_count
+from .base import get_parser
 from .base_labeling import BaseLabeling
 from pyannote.database import get_annotated
-from pyannote.metrics.detection import DetectionRecall
-from pyannote.metrics.detection import DetectionPrecision
-
-from pyannote.audio.labeling.extraction import SequenceLabeling
-from pyannote.audio.pipeline.overlap_detection \
-    import OverlapDetection as OverlapDetectionPipeline
 from pyannote.core import Timeline
 
 
@@ -178,7 +128,11 @@ def validate_helper_func(current_file, pipeline=None,
 
 class OverlapDetection(BaseLabeling):
 
-    Pipeline = OverlapDetectionPipeline
+    @property
+    def Pipeline(self):
+        from pyannote.audio.pipeline.overlap_detection \
+            import OverlapDetection
+        return OverlapDetection
 
     def validate_init(self, protocol_name, subset='development'):
         validation_data = super().validate_init(protocol_name, subset=subset)
@@ -200,6 +154,10 @@ class OverlapDetection(BaseLabeling):
     def validate_epoch(self, epoch, protocol_name, subset='development',
                        validation_data=None):
 
+        from pyannote.metrics.detection import DetectionRecall
+        from pyannote.metrics.detection import DetectionPrecision
+        from pyannote.audio.labeling.extraction import SequenceLabeling
+
         # load model for current epoch
         model = self.load_model(epoch).to(self.device)
         model.eval()
@@ -209,7 +167,8 @@ class OverlapDetection(BaseLabeling):
         sequence_labeling = SequenceLabeling(
             model=model, feature_extraction=self.feature_extraction_,
             duration=duration, step=.25 * duration, batch_size=self.batch_size,
-            device=self.device)
+            device=self.device, pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
         for current_file in validation_data:
             current_file['ovl_scores'] = sequence_labeling(current_file)
 
@@ -275,35 +234,78 @@ class OverlapDetection(BaseLabeling):
                                                   'pad_onset': 0.,
                                                   'pad_offset': 0.})}
 
+parser, modes = get_parser(__doc__)
+
+modes['train'].add_argument(
+    'experiment_dir', metavar='<experiment_dir>', type=Path,
+    help='Set experiment root directory. This script expects a configuration '
+         'file called "config.yml" to live in this directory. See '
+         '"Configuration file" section of --help for more details.')
+
+modes['validate'].add_argument(
+    'train_dir', metavar='<train_dir>', type=Path,
+    help='Path to the directory containing pre-trained models (i.e. the '
+         'output of "train" mode).')
+modes['validate'].add_argument(
+    '--every', metavar='<epoch>', type=int, default=1,
+    help='Validate model every <epoch> epochs. Defaults to 1.')
+modes['validate'].add_argument(
+    '--chronological', action='store_true',
+    help='Force validation in chronological order.')
+modes['validate'].add_argument(
+    '--parallel', metavar='<n_jobs>', dest='n_jobs', type=int, default=None,
+    help='Process <n_jobs> files in parallel. Defaults to using all CPUs '
+         'available to this process.')
+modes['validate'].add_argument(
+    '--precision', metavar='<precision>', type=float, default=0.8,
+    help='Target detection precision. Defaults to 0.8.')
+
+modes['apply'].add_argument(
+    'validate_dir', metavar='<validate_dir>', type=Path,
+    help='Path to the directory containing validation results (i.e. the '
+         'output of "validate" mode).')
+modes['apply'].add_argument(
+    '--step', metavar='<step>', type=float, default=None,
+    help='Sliding window step, in seconds. Defaults to 25%% of window '
+         'duration.')
+
+for mode_parser in modes.values():
+    mode_parser.add_argument(
+        'protocol_name', metavar='<database.task.protocol>',
+        help='Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")')
+
+
 def main():
-    arguments = docopt(__doc__, version='Overlapping speech detection')
+    arguments = parser.parse_args()
+
+    # only import torch once arguments are parsed, so that --help is fast
+    import torch
 
-    db_yml = arguments['--database']
-    protocol_name = arguments['<database.task.protocol>']
-    subset = arguments['--subset']
+    db_yml = arguments.db_yml
+    protocol_name = arguments.protocol_name
+    subset = arguments.subset
 
-    gpu = arguments['--gpu']
+    gpu = arguments.gpu
     device = torch.device('cuda') if gpu else torch.device('cpu')
 
-    # HACK to "book" GPU as soon as possible
-    _ = torch.Tensor([0]).to(device)
+    # "book" GPU as soon as possible (without allocating anything on it)
+    if gpu:
+        torch.cuda.init()
 
-    if arguments['train']:
-        experiment_dir = Path(arguments['<experiment_dir>'])
+    if arguments.mode == 'train':
+        experiment_dir = arguments.experiment_dir
         experiment_dir = experiment_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'train'
 
         # start training at this epoch (defaults to 0)
-        restart = int(arguments['--from'])
+        restart = arguments.from_epoch
 
         # stop training at this epoch (defaults to never stop)
-        epochs = arguments['--to']
+        epochs = arguments.to_epoch
         if epochs is None:
             epochs = np.inf
-        else:
-            epochs = int(epochs)
 
         application = OverlapDetection(experiment_dir, db_yml=db_yml,
                                        training=True)
@@ -311,47 +313,53 @@ def main():
         application.train(protocol_name, subset=subset,
                           restart=restart, epochs=epochs)
 
-    if arguments['validate']:
+    if arguments.mode == 'validate':
 
-        train_dir = Path(arguments['<train_dir>'])
+        train_dir = arguments.train_dir
         train_dir = train_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'development'
 
         # start validating at this epoch (defaults to 0)
-        start = int(arguments['--from'])
+        start = arguments.from_epoch
 
         # stop validating at this epoch (defaults to np.inf)
-        end = arguments['--to']
+        end = arguments.to_epoch
         if end is None:
             end = np.inf
-        else:
-            end = int(end)
 
         # validate every that many epochs (defaults to 1)
-        every = int(arguments['--every'])
+        every = arguments.every
 
         # validate epochs in chronological order
-        in_order = arguments['--chronological']
+        in_order = arguments.chronological
 
         # batch size
-        batch_size = int(arguments['--batch'])
+        batch_size = arguments.batch_size
+
+        # use page-locked memory for host-to-device copies
+        pin_memory = arguments.pin_memory
 
         # number of processes
-        n_jobs = arguments['--parallel']
+        n_jobs = arguments.n_jobs
         if n_jobs is None:
-            n_jobs = mp.cpu_count()
-        else:
-            n_jobs = int(n_jobs)
+            n_jobs = get_cpu_count()
+
+        # torch defaults to using all cores of the machine, even those
+        # this process is not allowed to run on
+        torch.set_num_threads(min(torch.get_num_threads(), get_cpu_count()))
 
-        precision = float(arguments['--precision'])
+        precision = arguments.precision
 
         application = OverlapDetection.from_train_dir(
             train_dir, db_yml=db_yml, training=False)
 
         application.device = device
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
         application.n_jobs = n_jobs
         application.precision = precision
 
@@ -360,22 +368,28 @@ def main():
             protocol_name, subset=subset, task=task,
             start=start, end=end, every=every, in_order=in_order)
 
-    if arguments['apply']:
+    if arguments.mode == 'apply':
 
-        validate_dir = Path(arguments['<validate_dir>'])
+        validate_dir = arguments.validate_dir
         validate_dir = validate_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'test'
 
-        step = arguments['--step']
-        if step is not None:
-            step = float(step)
+        step = arguments.step
+
+        batch_size = arguments.batch_size
+        pin_memory = arguments.pin_memory
 
-        batch_size = int(arguments['--batch'])
+        # extract features of upcoming files in the background
+        prefetch = arguments.prefetch
 
         application = OverlapDetection.from_validate_dir(
             validate_dir, db_yml=db_yml, training=False)
         application.device = device
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
+        application.prefetch = prefetch
         application.apply(protocol_name, step=step, subset=subset)
@@ -29,53 +29,6 @@
 """
 Speaker embedding
 
-Usage:
-  pyannote-speaker-embedding train [options] <experiment_dir> <database.task.protocol>
-  pyannote-speaker-embedding validate [options] [--duration=<duration> --every=<epoch> --chronological --purity=<purity> --metric=<metric>] <train_dir> <database.task.protocol>
-  pyannote-speaker-embedding apply [options] [--duration=<duration> --step=<step>] <validate_dir> <database.task.protocol>
-  pyannote-speaker-embedding -h | --help
-  pyannote-speaker-embedding --version
-
-Common options:
-  <database.task.protocol>   Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")
-  --database=<database.yml>  Path to pyannote.database configuration file.
-  --subset=<subset>          Set subset (train|developement|test).
-                             Defaults to "train" in "train" mode. Defaults to
-                             "development" in "validate" mode. Defaults to
-                             "test" in "apply" mode.
-  --gpu                      Run on GPUs. Defaults to using CPUs.
-  --batch=<size>             Set batch size. Has no effect in "train" mode.
-                             [default: 32]
-  --from=<epoch>             Start {train|validat}ing at epoch <epoch>. Has no
-                             effect in "apply" mode. [default: 0]
-  --to=<epochs>              End {train|validat}ing at epoch <epoch>.
-                             Defaults to keep going forever.
-  --duration=<duration>      {Validate|apply} using subsequences with that
-                             duration. Defaults to embedding fixed duration
-                             when available.
-
-"train" mode:
-  <experiment_dir>           Set experiment root directory. This script expects
-                             a configuration file called "config.yml" to live
-                             in this directory. See "Configuration file"
-                             section below for more details.
-
-"validation" mode:
-  --every=<epoch>            Validate model every <epoch> epochs [default: 1].
-  --chronological            Force validation in chronological order.
-  --purity=<purity>          Target cluster purity [default: 0.9].
-  <train_dir>                Path to the directory containing pre-trained
-                             models (i.e. the output of "train" mode).
-  --metric=<metric>          Use this metric (e.g. "cosine" or "euclidean") to
-                             compare embeddings. Defaults to the metric defined
-                             in "config.yml" configuration file.
-
-"apply" mode:
-  <validate_dir>             Path to the directory containing validation
-                             results (i.e. the output of "validate" mode).
-  --step=<step>              Sliding window step, in seconds.
-                             Defaults to 25% of window duration.
-
 Configuration file:
     The configuration of each experiment is described in a file called
     <experiment_dir>/config.yml, that describes the feature extraction process,
@@ -170,14 +123,13 @@ Configuration file:
 
 """
 
-import torch
 import numpy as np
 from pathlib import Path
-from docopt import docopt
 from functools import partial
 from typing import Optional
 
 from .base import Application
+from .base import get_parser
 
 from pyannote.core import Segment, Timeline, Annotation
 
@@ -188,20 +140,10 @@ from pyannote.database import get_unique_identifier
 from pyannote.database.protocol import SpeakerDiarizationProtocol
 from pyannote.database.protocol import SpeakerVerificationProtocol
 
-from scipy.cluster.hierarchy import fcluster
-from scipy.cluster.hierarchy import linkage
-
 from pyannote.core.utils.helper import get_class_by_name
 
-from pyannote.core.utils.distance import pdist
-from pyannote.core.utils.distance import cdist
 from pyannote.audio.features.precomputed import Precomputed
 
-from pyannote.metrics.binary_classification import det_curve
-from pyannote.metrics.diarization import DiarizationPurityCoverageFMeasure
-
-from pyannote.audio.embedding.extraction import SequenceEmbedding
-
 
 class SpeakerEmbedding(Application):
 
@@ -318,6 +260,10 @@ class SpeakerEmbedding(Application):
         metrics : dict
         """
 
+        from pyannote.core.utils.distance import cdist
+        from pyannote.metrics.binary_classification import det_curve
+        from pyannote.audio.embedding.extraction import SequenceEmbedding
+
         # load current model
         model = self.load_model(epoch).to(self.device)
         model.eval()
@@ -345,7 +291,9 @@ class SpeakerEmbedding(Application):
         sequence_embedding = SequenceEmbedding(
             model=model, feature_extraction=self.feature_extraction_,
             duration=duration, step=step, min_duration=min_duration,
-            batch_size=self.batch_size, device=self.device)
+            batch_size=self.batch_size, device=self.device,
+            pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
 
         protocol = get_protocol(protocol_name, progress=False,
                                 preprocessors=self.preprocessors_)
@@ -408,6 +356,13 @@ class SpeakerEmbedding(Application):
         metrics : dict
         """
 
+        from scipy.cluster.hierarchy import fcluster
+        from scipy.cluster.hierarchy import linkage
+        from pyannote.core.utils.distance import pdist
+        from pyannote.metrics.diarization \
+            import DiarizationPurityCoverageFMeasure
+        from pyannote.audio.embedding.extraction import SequenceEmbedding
+
         # load current model
         model = self.load_model(epoch).to(self.device)
         model.eval()
@@ -435,7 +390,9 @@ class SpeakerEmbedding(Application):
         sequence_embedding = SequenceEmbedding(
             model=model, feature_extraction=self.feature_extraction_,
             duration=duration, step=step, min_duration=min_duration,
-            batch_size=self.batch_size, device=self.device)
+            batch_size=self.batch_size, device=self.device,
+            pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
 
         protocol = get_protocol(protocol_name, progress=False,
                                 preprocessors=self.preprocessors_)
@@ -525,6 +482,8 @@ class SpeakerEmbedding(Application):
                     step: Optional[float] = None,
                     subset: Optional[str] = "test"):
 
+        from pyannote.audio.embedding.extraction import SequenceEmbedding
+
         model = self.model_.to(self.device)
         model.eval()
 
@@ -546,7 +505,9 @@ class SpeakerEmbedding(Application):
             feature_extraction=self.feature_extraction_,
             duration=duration, step=step,
             batch_size=self.batch_size,
-            device=self.device)
+            device=self.device,
+            pin_memory=self.pin_memory,
+            autocast=self.autocast, async_copy=self.async_copy)
 
         sliding_window = sequence_embedding.sliding_window
         dimension = sequence_embedding.dimension
@@ -562,39 +523,90 @@ class SpeakerEmbedding(Application):
         protocol = get_protocol(protocol_name, progress=True,
                                 preprocessors=self.preprocessors_)
 
-        for current_file in getattr(protocol, subset)():
+        files = self.prefetch_features(getattr(protocol, subset)(),
+                                       prefetch=self.prefetch)
+        for current_file in files:
             fX = sequence_embedding(current_file)
             precomputed.dump(current_file, fX)
 
 
+parser, modes = get_parser(__doc__)
+
+modes['train'].add_argument(
+    'experiment_dir', metavar='<experiment_dir>', type=Path,
+    help='Set experiment root directory. This script expects a configuration '
+         'file called "config.yml" to live in this directory. See '
+         '"Configuration file" section of --help for more details.')
+
+modes['validate'].add_argument(
+    'train_dir', metavar='<train_dir>', type=Path,
+    help='Path to the directory containing pre-trained models (i.e. the '
+         'output of "train" mode).')
+modes['validate'].add_argument(
+    '--every', metavar='<epoch>', type=int, default=1,
+    help='Validate model every <epoch> epochs. Defaults to 1.')
+modes['validate'].add_argument(
+    '--chronological', action='store_true',
+    help='Force validation in chronological order.')
+modes['validate'].add_argument(
+    '--purity', metavar='<purity>', type=float, default=0.9,
+    help='Target cluster purity. Defaults to 0.9.')
+modes['validate'].add_argument(
+    '--metric', metavar='<metric>',
+    help='Use this metric (e.g. "cosine" or "euclidean") to compare '
+         'embeddings. Defaults to the metric defined in "config.yml" '
+         'configuration file.')
+
+modes['apply'].add_argument(
+    'validate_dir', metavar='<validate_dir>', type=Path,
+    help='Path to the directory containing validation results (i.e. the '
+         'output of "validate" mode).')
+modes['apply'].add_argument(
+    '--step', metavar='<step>', type=float, default=None,
+    help='Sliding window step, in seconds. Defaults to 25%% of window '
+         'duration.')
+
+for mode in ['validate', 'apply']:
+    modes[mode].add_argument(
+        '--duration', metavar='<duration>', type=float, default=None,
+        help='{Validate|apply} using subsequences with that duration. '
+             'Defaults to embedding fixed duration when available.')
+
+for mode_parser in modes.values():
+    mode_parser.add_argument(
+        'protocol_name', metavar='<database.task.protocol>',
+        help='Experimental protocol (e.g. "AMI.SpeakerDiarization.MixHeadset")')
+
+
 def main():
 
-    arguments = docopt(__doc__, version='Speaker embedding')
+    arguments = parser.parse_args()
 
-    db_yml = arguments['--database']
-    protocol_name = arguments['<database.task.protocol>']
-    subset = arguments['--subset']
+    # only import torch once arguments are parsed, so that --help is fast
+    import torch
 
-    gpu = arguments['--gpu']
+    db_yml = arguments.db_yml
+    protocol_name = arguments.protocol_name
+    subset = arguments.subset
+
+    gpu = arguments.gpu
     device = torch.device('cuda') if gpu else torch.device('cpu')
 
-    if arguments['train']:
+    if arguments.mode == 'train':
 
-        experiment_dir = Path(arguments['<experiment_dir>'])
+        experiment_dir = arguments.experiment_dir
         experiment_dir = experiment_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'train'
 
         # start training at this epoch (defaults to 0)
-        restart = int(arguments['--from'])
+        restart = arguments.from_epoch
 
         # stop training at this epoch (defaults to never stop)
-        epochs = arguments['--to']
+        epochs = arguments.to_epoch
         if epochs is None:
             epochs = np.inf
-        else:
-            epochs = int(epochs)
 
         application = SpeakerEmbedding(experiment_dir, db_yml=db_yml,
                                        training=True)
@@ -602,42 +614,46 @@ def main():
         application.train(protocol_name, subset=subset,
                           restart=restart, epochs=epochs)
 
-    if arguments['validate']:
+    if arguments.mode == 'validate':
 
-        train_dir = Path(arguments['<train_dir>'])
+        train_dir = arguments.train_dir
         train_dir = train_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'development'
 
         # start validating at this epoch (defaults to 0)
-        start = int(arguments['--from'])
+        start = arguments.from_epoch
 
         # stop validating at this epoch (defaults to np.inf)
-        end = arguments['--to']
+        end = arguments.to_epoch
         if end is None:
             end = np.inf
-        else:
-            end = int(end)
 
         # validate every that many epochs (defaults to 1)
-        every = int(arguments['--every'])
+        every = arguments.every
 
         # validate epochs in chronological order
-        in_order = arguments['--chronological']
+        in_order = arguments.chronological
 
         # batch size
-        batch_size = int(arguments['--batch'])
+        batch_size = arguments.batch_size
+
+        # use page-locked memory for host-to-device copies
+        pin_memory = arguments.pin_memory
 
-        purity = float(arguments['--purity'])
+        purity = arguments.purity
 
         application = SpeakerEmbedding.from_train_dir(
             train_dir, db_yml=db_yml, training=False)
         application.device = device
         application.purity = purity
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
 
-        metric = arguments['--metric']
+        metric = arguments.metric
         if metric is None:
             metric = getattr(application.task_, 'metric', None)
             if metric is None:
@@ -646,43 +662,44 @@ def main():
                 raise ValueError(msg)
         application.metric = metric
 
-        duration = arguments['--duration']
-        if duration is not None:
-            duration = float(duration)
-        application.duration = duration
+        application.duration = arguments.duration
 
         application.validate(protocol_name, subset=subset,
                              start=start, end=end, every=every,
                              in_order=in_order)
 
-    if arguments['apply']:
+    if arguments.mode == 'apply':
 
-        validate_dir = Path(arguments['<validate_dir>'])
+        validate_dir = arguments.validate_dir
         validate_dir = validate_dir.expanduser().resolve(strict=True)
 
         if subset is None:
             subset = 'test'
 
-        step = arguments['--step']
-        if step is not None:
-            step = float(step)
+        step = arguments.step
 
-        batch_size = int(arguments['--batch'])
+        batch_size = arguments.batch_size
+        pin_memory = arguments.pin_memory
+
+        # extract features of upcoming files in the background
+        prefetch = arguments.prefetch
 
         application = SpeakerEmbedding.from_validate_dir(
             validate_dir, db_yml=db_yml, training=False)
         application.device = device
         application.batch_size = batch_size
+        application.pin_memory = pin_memory
+        application.autocast = arguments.autocast
+        application.async_copy = arguments.async_copy
+        application.prefetch = prefetch
 
-        duration = arguments['--duration']
+        duration = arguments.duration
         if duration is None:
             duration = getattr(application.task_, 'duration', None)
             if duration is None:
                 msg = ("Approach has no 'duration' defined. "
                        "Use '--duration' option to provide one.")
                 raise ValueError(msg)
-        else:
-            duration = float(duration)
         application.duration = duration
 
         application.apply(protocol_name, step=step, subset=subset)
@@ -60,11 +60,22 @@ class SequenceEmbedding(SequenceLabeling):
         Defaults to 32.
     device : `torch.device` or `str`, optional
         Defaults to CPU.
+    pin_memory : bool, optional
+        Copy batches to page-locked memory before sending them (asynchronously)
+        to `device`. Only useful when `device` is a GPU. Defaults to False.
+    autocast : {'fp32', 'fp16', 'bf16'} or `torch.dtype`, optional
+        Run model with automatic mixed precision using this data type.
+        Defaults to full precision ('fp32').
+    async_copy : bool, optional
+        Send batches to `device` on a dedicated CUDA stream so that copying
+        next batch overlaps with processing current one. Implies `pin_memory`.
+        Only useful when `device` is a GPU. Defaults to False.
     """
 
     def __init__(self, model=None, feature_extraction=None,
                  step=None, duration=None, min_duration=None,
-                 batch_size=32, device=None):
+                 batch_size=32, device=None, pin_memory=False,
+                 autocast=None, async_copy=False):
 
         # support for providing device as 'cpu' or 'cuda'
         if isinstance(device, str):
@@ -94,7 +105,9 @@ class SequenceEmbedding(SequenceLabeling):
 
         super().__init__(model=model, feature_extraction=feature_extraction,
                          step=step, duration=duration, min_duration=min_duration,
-                         batch_size=batch_size, device=device)
+                         batch_size=batch_size, device=device,
+                         pin_memory=pin_memory, autocast=autocast,
+                         async_copy=async_copy)
 
     def augmentation():
         doc = "Data augmentation."
@@ -39,6 +39,11 @@ from pyannote.database import get_unique_identifier
 from pyannote.audio.features import Precomputed
 from pyannote.audio.features import RawAudio
 
+# automatic mixed precision data types
+AUTOCAST_DTYPES = {'fp32': None,
+                   'fp16': torch.float16,
+                   'bf16': torch.bfloat16}
+
 
 class SequenceLabeling(FileBasedBatchGenerator):
     """Sequence labeling
@@ -65,11 +70,22 @@ class SequenceLabeling(FileBasedBatchGenerator):
         Defaults to 32.
     device : torch.device, optional
         Defaults to CPU.
+    pin_memory : bool, optional
+        Copy batches to page-locked memory before sending them (asynchronously)
+        to `device`. Only useful when `device` is a GPU. Defaults to False.
+    autocast : {'fp32', 'fp16', 'bf16'} or `torch.dtype`, optional
+        Run model with automatic mixed precision using this data type.
+        Defaults to full precision ('fp32').
+    async_copy : bool, optional
+        Send batches to `device` on a dedicated CUDA stream so that copying
+        next batch overlaps with processing current one. Implies `pin_memory`.
+        Only useful when `device` is a GPU. Defaults to False.
     """
 
     def __init__(self, model=None, feature_extraction=None, duration=1,
                  min_duration=None, step=None, batch_size=32, device=None,
-                 return_intermediate=None):
+                 return_intermediate=None, pin_memory=False, autocast=None,
+                 async_copy=False):
 
         if not isinstance(model, nn.Module):
 
@@ -86,6 +102,16 @@ class SequenceLabeling(FileBasedBatchGenerator):
         self.device = torch.device('cpu') if device is None \
                                           else torch.device(device)
         self.model = model.eval().to(self.device)
+        self.async_copy = async_copy and self.device.type == 'cuda'
+        if self.async_copy:
+            self.copy_stream_ = torch.cuda.Stream(self.device)
+        # non_blocking copies need page-locked memory
+        self.pin_memory = (pin_memory or self.async_copy) and \
+                          self.device.type == 'cuda'
+
+        if isinstance(autocast, str):
+            autocast = AUTOCAST_DTYPES[autocast]
+        self.autocast = autocast
 
         if feature_extraction.augmentation is not None:
             msg = (
@@ -115,7 +141,9 @@ class SequenceLabeling(FileBasedBatchGenerator):
         self.return_intermediate = return_intermediate
 
         super(SequenceLabeling, self).__init__(
-            generator, {'@': (self._process, self.forward)},
+            generator,
+            {'@': (self._process,
+                   self._launch if self.async_copy else self.forward)},
             batch_size=batch_size, incomplete=False)
 
     @property
@@ -198,6 +226,16 @@ class SequenceLabeling(FileBasedBatchGenerator):
         # use in-memory "features" whenever they are available
         if 'features' in current_file:
             features = current_file['features']
+
+            # same frames as features.crop(segment, mode='center',
+            # fixed=self.duration) but without its overhead, as long as
+            # segment does not go beyond features boundaries
+            frames = features.sliding_window
+            i = frames.closest_frame(segment.start)
+            n = frames.samples(self.duration, mode='center')
+            if i >= 0 and i + n <= len(features.data):
+                return features.data[i: i + n]
+
             return features.crop(segment, mode='center', fixed=self.duration)
 
         # this line will only happen when self.feature_extraction is a
@@ -205,6 +243,96 @@ class SequenceLabeling(FileBasedBatchGenerator):
         return self.feature_extraction.crop(current_file, segment,
                                             mode='center', fixed=self.duration)
 
+    def _to_device(self, x):
+        """Send numpy array to device as float32 tensor
+
+        When `pin_memory` is True, the tensor is first copied to page-locked
+        memory so that the host-to-device copy does not block.
+        """
+
+        x = torch.tensor(x, dtype=torch.float32)
+        if self.pin_memory:
+            return x.pin_memory().to(self.device, non_blocking=True)
+        return x.to(self.device)
+
+    def _apply_model(self, packed):
+
+        # no need for autograd bookkeeping (graph, version counters)
+        # as gradients are never computed here
+        with torch.inference_mode():
+            if self.return_intermediate is None:
+                return self.model(packed)
+            _, fX = self.model(packed,
+                               return_intermediate=self.return_intermediate)
+            return fX
+
+    def _pack(self, X):
+        """Send batch of (variable-length) sequences to device"""
+
+        lengths = [len(x) for x in X]
+        variable_lengths = len(set(lengths)) > 1
+
+        if variable_lengths:
+            _, sort = torch.sort(torch.tensor(lengths), descending=True)
+            _, unsort = torch.sort(sort)
+            sequences = [self._to_device(X[i]) for i in sort]
+            return pack_sequence(sequences), unsort
+
+        return self._to_device(np.stack(X)), None
+
+    def _launch(self, X):
+        """Start processing batch of (variable-length) sequences
+
+        When `async_copy` is True, the batch is sent to the GPU on a dedicated
+        CUDA stream, and the results are sent back without waiting for them.
+        Use `_collect` to get the actual results.
+        """
+
+        if not self.async_copy:
+            packed, unsort = self._pack(X)
+            return self._run(packed).detach().to('cpu'), unsort, None
+
+        # host-to-device copy on the side stream...
+        compute_stream = torch.cuda.current_stream(self.device)
+        with torch.cuda.stream(self.copy_stream_):
+            packed, unsort = self._pack(X)
+
+        # ... and compute stream waits for it to be completed before using
+        # the batch; record_stream prevents the caching allocator from
+        # reusing its memory while compute stream might still be reading it
+        compute_stream.wait_stream(self.copy_stream_)
+        data = packed if isinstance(packed, torch.Tensor) else packed.data
+        data.record_stream(compute_stream)
+
+        fX = self._run(packed).detach().to('cpu', non_blocking=True)
+        done = torch.cuda.Event()
+        done.record(compute_stream)
+        return fX, unsort, done
+
+    def _collect(self, launched):
+        """Wait for batch started with `_launch` and return its results"""
+
+        fX, unsort, done = launched
+        if done is not None:
+            done.synchronize()
+
+        fX = fX.numpy()
+
+        if unsort is not None:
+            return fX[unsort]
+
+        return fX
+
+    def _run(self, packed):
+
+        if self.autocast is None:
+            return self._apply_model(packed)
+
+        with torch.autocast(self.device.type, dtype=self.autocast):
+            fX = self._apply_model(packed)
+        # numpy does not support bfloat16
+        return fX.float()
+
     def forward(self, X):
         """Process (variable-length) sequences
 
@@ -219,33 +347,30 @@ class SequenceLabeling(FileBasedBatchGenerator):
             Batch of sequence embeddings.
         """
 
-        lengths = [len(x) for x in X]
-        variable_lengths = len(set(lengths)) > 1
-
-        if variable_lengths:
-            _, sort = torch.sort(torch.tensor(lengths), descending=True)
-            _, unsort = torch.sort(sort)
-            sequences = [torch.tensor(X[i],
-                                      dtype=torch.float32,
-                                      device=self.device) for i in sort]
-            packed = pack_sequence(sequences)
-        else:
-            packed = torch.tensor(np.stack(X),
-                                  dtype=torch.float32,
-                                  device=self.device)
+        return self._collect(self._launch(X))
 
-        if self.return_intermediate is None:
-            fX = self.model(packed)
-        else:
-            _, fX = self.model(packed,
-                               return_intermediate=self.return_intermediate)
-
-        fX = fX.detach().to('cpu').numpy()
+    def from_file(self, current_file, incomplete=True):
+        """Generate batches of predictions by looping over one file
 
-        if variable_lengths:
-            return fX[unsort]
+        When `async_copy` is True, batch k+1 is prepared and sent to the GPU
+        while batch k is still being processed.
+        """
 
-        return fX
+        if not self.async_copy:
+            yield from super(SequenceLabeling, self).from_file(
+                current_file, incomplete=incomplete)
+            return
+
+        # signature packs batches with `_launch` in that case
+        launched = None
+        for batch in super(SequenceLabeling, self).from_file(
+            current_file, incomplete=incomplete):
+            if launched is not None:
+                yield self._collect(launched)
+            launched = batch
+
+        if launched is not None:
+            yield self._collect(launched)
 
     def __call__(self, current_file):
         """Compute predictions on a sliding window
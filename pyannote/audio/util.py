@@ -28,6 +28,7 @@
 
 import os
 import errno
+import multiprocessing
 
 
 def mkdir_p(path):
@@ -52,3 +53,23 @@ def mkdir_p(path):
             pass
         else:
             raise exc
+
+
+def get_cpu_count():
+    """Get number of CPUs available to current process
+
+    Unlike `multiprocessing.cpu_count`, this takes CPU affinity into account
+    (e.g. when running in a SLURM job or a container restricted to a subset
+    of the machine cores).
+
+    Returns
+    -------
+    cpu_count : int
+        Number of available CPUs.
+    """
+
+    try:
+        return len(os.sched_getaffinity(0))
+    # os.sched_getaffinity is not available on all platforms (e.g. macOS)
+    except AttributeError:
+        return multiprocessing.cpu_count()